@@ -1,15 +1,27 @@
 """
 Core application components.
 """
-from app.core.config import settings
-from app.core.database import Database, get_database
-from app.core.security import Security, get_current_user, require_user_type
+from app.core.config import settings, get_settings
+from app.core.database import Database, BatchedInserter, get_database
+from app.core.security import (
+    Security,
+    get_current_user,
+    invalidate_user_cache,
+    require_user_type,
+    start_hash_pool,
+    shutdown_hash_pool,
+)
 
 __all__ = [
     "settings",
+    "get_settings",
     "Database",
+    "BatchedInserter",
     "get_database",
     "Security",
     "get_current_user",
+    "invalidate_user_cache",
     "require_user_type",
+    "start_hash_pool",
+    "shutdown_hash_pool",
 ]
@@ -3,6 +3,7 @@ Pydantic schemas for calls and WebRTC signaling.
 """
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
+from datetime import datetime
 
 
 class CallInitiate(BaseModel):
@@ -18,10 +19,10 @@ class CallResponse(BaseModel):
     receiver_id: str
     call_type: str
     status: str
-    started_at: Optional[str] = None
-    ended_at: Optional[str] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
     duration_seconds: Optional[int] = None
-    created_at: str
+    created_at: datetime
 
 
 class CallUpdate(BaseModel):
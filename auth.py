@@ -1,20 +1,49 @@
 """
 Authentication and user management routes.
 """
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends
 from app.core.database import get_database
-from app.core.security import Security, get_current_user
+from app.core.security import Security, get_current_user, invalidate_user_cache
+from pymongo import ReturnDocument
 from app.schemas.users import (
     UserRegister, UserLogin, UserResponse, 
     TokenResponse, UserUpdate, PasswordChange
 )
 from datetime import datetime, timezone
-import uuid
+from typing import Dict
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Projections so queries only ship the fields each handler needs
+_USER_PROFILE_PROJ = {
+    "_id": 0,
+    "user_id": 1,
+    "email": 1,
+    "full_name": 1,
+    "user_type": 1,
+    "phone": 1,
+    "country": 1,
+    "timezone": 1,
+    "avatar_url": 1,
+    "is_active": 1,
+    "created_at": 1,
+}
+_USER_AUTH_PROJ = {**_USER_PROFILE_PROJ, "password": 1}
+_USER_PWD_PROJ = {"_id": 0, "password": 1}
+
+
+def _user_gone(user_id: str) -> HTTPException:
+    """
+    Build the error for a user deleted since their lookup was cached.
+    
+    The cached lookup is dropped so later requests fail in get_current_user.
+    """
+    invalidate_user_cache(user_id)
+    return HTTPException(status_code=401, detail="User not found")
+
 
 @router.post("/register", response_model=TokenResponse)
 async def register_user(user_data: UserRegister):
@@ -30,15 +59,15 @@ async def register_user(user_data: UserRegister):
     db = get_database()
     
     # Check if email already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = Security.hash_password(user_data.password)
+    hashed_password = await Security.hash_password(user_data.password)
     
     # Create user document
-    user_id = f"user_{uuid.uuid4().hex[:12]}"
+    user_id = f"user_{secrets.token_hex(6)}"
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
@@ -50,11 +79,11 @@ async def register_user(user_data: UserRegister):
         "timezone": user_data.timezone,
         "avatar_url": user_data.avatar_url,
         "is_active": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(user_doc)
-    logger.info(f"New user registered: {user_id} ({user_data.email})")
+    logger.info("New user registered: %s (%s)", user_id, user_data.email)
     
     # Create JWT token
     token = Security.create_jwt_token(user_id, user_data.email, user_data.user_type)
@@ -63,9 +92,9 @@ async def register_user(user_data: UserRegister):
     user_doc.pop("password")
     user_doc.pop("_id")
     
-    return TokenResponse(
+    return TokenResponse.model_construct(
         token=token,
-        user=UserResponse(**user_doc)
+        user=UserResponse.model_construct(**user_doc)
     )
 
 
@@ -83,18 +112,26 @@ async def login_user(credentials: UserLogin):
     db = get_database()
     
     # Find user by email
-    user = await db.users.find_one({"email": credentials.email})
+    user = await db.users.find_one({"email": credentials.email}, _USER_AUTH_PROJ)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Verify password
-    if not Security.verify_password(credentials.password, user["password"]):
+    if not await Security.verify_password(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Check if account is active
     if not user.get("is_active", True):
         raise HTTPException(status_code=403, detail="Account is deactivated")
     
+    # Opportunistically upgrade legacy bcrypt hashes to argon2id
+    if Security.needs_rehash(user["password"]):
+        upgraded_hash = await Security.hash_password(credentials.password)
+        await db.users.update_one(
+            {"user_id": user["user_id"]},
+            {"$set": {"password": upgraded_hash}}
+        )
+    
     # Create JWT token
     token = Security.create_jwt_token(
         user["user_id"], 
@@ -102,32 +139,35 @@ async def login_user(credentials: UserLogin):
         user["user_type"]
     )
     
-    logger.info(f"User logged in: {user['user_id']} ({user['email']})")
+    logger.info("User logged in: %s (%s)", user['user_id'], user['email'])
     
-    # Remove password and _id from response
+    # Remove password from response
     user.pop("password")
-    user.pop("_id")
     
-    return TokenResponse(
+    return TokenResponse.model_construct(
         token=token,
-        user=UserResponse(**user)
+        user=UserResponse.model_construct(**user)
     )
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_profile(request: Request):
+async def get_current_user_profile(user: Dict = Depends(get_current_user)):
     """
     Get current authenticated user profile.
     
     Returns:
         User profile data
     """
-    user = await get_current_user(request)
-    return UserResponse(**user)
+    # The authenticated user only carries identity fields; load the full profile
+    db = get_database()
+    profile = await db.users.find_one({"user_id": user["user_id"]}, _USER_PROFILE_PROJ)
+    if not profile:
+        raise _user_gone(user["user_id"])
+    return UserResponse.model_construct(**profile)
 
 
 @router.put("/me", response_model=UserResponse)
-async def update_user_profile(request: Request, update_data: UserUpdate):
+async def update_user_profile(update_data: UserUpdate, user: Dict = Depends(get_current_user)):
     """
     Update current user profile.
     
@@ -137,34 +177,35 @@ async def update_user_profile(request: Request, update_data: UserUpdate):
     Returns:
         Updated user profile
     """
-    user = await get_current_user(request)
     db = get_database()
     
     # Prepare update data (exclude None values)
     update_fields = update_data.model_dump(exclude_none=True)
     
     if not update_fields:
-        return UserResponse(**user)
+        profile = await db.users.find_one({"user_id": user["user_id"]}, _USER_PROFILE_PROJ)
+        if not profile:
+            raise _user_gone(user["user_id"])
+        return UserResponse.model_construct(**profile)
     
-    # Update user in database
-    await db.users.update_one(
+    # Update user and fetch the updated document in one round-trip
+    updated_user = await db.users.find_one_and_update(
         {"user_id": user["user_id"]},
-        {"$set": update_fields}
+        {"$set": update_fields},
+        projection=_USER_PROFILE_PROJ,
+        return_document=ReturnDocument.AFTER
     )
+    if not updated_user:
+        raise _user_gone(user["user_id"])
     
-    # Fetch updated user
-    updated_user = await db.users.find_one(
-        {"user_id": user["user_id"]}, 
-        {"_id": 0, "password": 0}
-    )
+    invalidate_user_cache(user["user_id"])
+    logger.info("User profile updated: %s", user['user_id'])
     
-    logger.info(f"User profile updated: {user['user_id']}")
-    
-    return UserResponse(**updated_user)
+    return UserResponse.model_construct(**updated_user)
 
 
 @router.post("/change-password")
-async def change_password(request: Request, password_data: PasswordChange):
+async def change_password(password_data: PasswordChange, user: Dict = Depends(get_current_user)):
     """
     Change user password.
     
@@ -174,25 +215,31 @@ async def change_password(request: Request, password_data: PasswordChange):
     Returns:
         Success message
     """
-    user = await get_current_user(request)
     db = get_database()
     
-    # Get user with password
-    user_with_password = await db.users.find_one({"user_id": user["user_id"]})
+    # Fetch only the password hash; the rest is already on the request user
+    user_with_password = await db.users.find_one(
+        {"user_id": user["user_id"]},
+        _USER_PWD_PROJ
+    )
+    if not user_with_password:
+        raise _user_gone(user["user_id"])
     
     # Verify old password
-    if not Security.verify_password(password_data.old_password, user_with_password["password"]):
+    if not await Security.verify_password(password_data.old_password, user_with_password["password"]):
         raise HTTPException(status_code=400, detail="Incorrect old password")
     
     # Hash new password
-    new_hashed_password = Security.hash_password(password_data.new_password)
+    new_hashed_password = await Security.hash_password(password_data.new_password)
     
     # Update password
     await db.users.update_one(
         {"user_id": user["user_id"]},
         {"$set": {"password": new_hashed_password}}
     )
+    Security.invalidate_password_cache(user_with_password["password"])
+    invalidate_user_cache(user["user_id"])
     
-    logger.info(f"Password changed for user: {user['user_id']}")
+    logger.info("Password changed for user: %s", user['user_id'])
     
     return {"message": "Password changed successfully"}
@@ -1,43 +1,85 @@
 """
 Video/audio call routes and WebRTC signaling.
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from app.core.database import get_database
 from app.core.security import get_current_user
-from app.schemas.calls import CallInitiate, CallResponse, CallUpdate, WebRTCSignal
+from app.schemas.calls import CallInitiate, CallUpdate, WebRTCSignal
 from app.services.websocket import manager
 from app.services.email import email_service
 from app.core.config import settings
 from datetime import datetime, timezone
-import uuid
+from typing import Dict, List
+import asyncio
+import heapq
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/calls", tags=["Calls"])
 
 
-@router.post("/initiate", response_model=CallResponse)
-async def initiate_call(request: Request, call_data: CallInitiate):
+def _call_created_at(call: dict) -> datetime:
+    """Sort key for call sessions, accepting legacy ISO-string timestamps."""
+    created_at = call["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def merge_call_history(outgoing: List[dict], incoming: List[dict], limit: int) -> List[dict]:
+    """
+    Merge two newest-first call lists into one, dropping duplicates.
+    
+    Args:
+        outgoing: Calls placed by the user, newest first
+        incoming: Calls received by the user, newest first
+        limit: Maximum number of calls to return
+        
+    Returns:
+        Up to ``limit`` calls, newest first
+    """
+    calls = []
+    seen_call_ids = set()
+    for call in heapq.merge(outgoing, incoming, key=_call_created_at, reverse=True):
+        if call["call_id"] in seen_call_ids:
+            continue
+        seen_call_ids.add(call["call_id"])
+        calls.append(call)
+        if len(calls) >= limit:
+            break
+    return calls
+
+
+@router.post("/initiate")
+async def initiate_call(call_data: CallInitiate, user: Dict = Depends(get_current_user)):
     """Initiate a call to another user."""
-    user = await get_current_user(request)
     db = get_database()
     
-    # Verify receiver exists
-    receiver = await db.users.find_one({"user_id": call_data.receiver_id}, {"_id": 0})
-    if not receiver:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Create call session
     call = {
-        "call_id": f"call_{uuid.uuid4().hex[:12]}",
+        "call_id": f"call_{secrets.token_hex(6)}",
         "caller_id": user["user_id"],
         "receiver_id": call_data.receiver_id,
         "call_type": call_data.call_type,
         "status": "ringing",
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
-    await db.call_sessions.insert_one(call)
+    # Look up the receiver and insert the session concurrently
+    receiver, _ = await asyncio.gather(
+        db.users.find_one(
+            {"user_id": call_data.receiver_id},
+            {"_id": 0, "email": 1, "full_name": 1}
+        ),
+        db.call_sessions.insert_one(call)
+    )
+    if not receiver:
+        await db.call_sessions.delete_one({"call_id": call["call_id"]})
+        raise HTTPException(status_code=404, detail="User not found")
     
     # Notify receiver via WebSocket
     if manager.is_user_online(call_data.receiver_id):
@@ -57,13 +99,12 @@ async def initiate_call(request: Request, call_data: CallInitiate):
         )
     
     call.pop("_id", None)
-    return CallResponse(**call)
+    return ORJSONResponse(call)
 
 
-@router.put("/{call_id}/status", response_model=CallResponse)
-async def update_call_status(request: Request, call_id: str, status_data: CallUpdate):
+@router.put("/{call_id}/status")
+async def update_call_status(call_id: str, status_data: CallUpdate, user: Dict = Depends(get_current_user)):
     """Update call status (accept, decline, end)."""
-    user = await get_current_user(request)
     db = get_database()
     
     call = await db.call_sessions.find_one({"call_id": call_id}, {"_id": 0})
@@ -75,14 +116,16 @@ async def update_call_status(request: Request, call_id: str, status_data: CallUp
     
     update_data = {"status": status_data.status}
     
+    now = datetime.now(timezone.utc)
     if status_data.status == "accepted":
-        update_data["started_at"] = datetime.now(timezone.utc).isoformat()
+        update_data["started_at"] = now
     elif status_data.status in ["ended", "declined", "missed"]:
-        update_data["ended_at"] = datetime.now(timezone.utc).isoformat()
+        update_data["ended_at"] = now
         if call.get("started_at"):
-            started = datetime.fromisoformat(call["started_at"])
-            ended = datetime.now(timezone.utc)
-            update_data["duration_seconds"] = int((ended - started).total_seconds())
+            started = call["started_at"]
+            if isinstance(started, str):  # legacy ISO-string timestamps
+                started = datetime.fromisoformat(started)
+            update_data["duration_seconds"] = int((now - started).total_seconds())
     
     await db.call_sessions.update_one(
         {"call_id": call_id},
@@ -98,13 +141,12 @@ async def update_call_status(request: Request, call_id: str, status_data: CallUp
     }, other_user_id)
     
     updated_call = await db.call_sessions.find_one({"call_id": call_id}, {"_id": 0})
-    return CallResponse(**updated_call)
+    return ORJSONResponse(updated_call)
 
 
 @router.post("/{call_id}/signal")
-async def send_webrtc_signal(request: Request, call_id: str, signal_data: WebRTCSignal):
+async def send_webrtc_signal(call_id: str, signal_data: WebRTCSignal, user: Dict = Depends(get_current_user)):
     """Send WebRTC signaling data (offer/answer/ICE candidate)."""
-    user = await get_current_user(request)
     db = get_database()
     
     call = await db.call_sessions.find_one({"call_id": call_id}, {"_id": 0})
@@ -128,21 +170,42 @@ async def send_webrtc_signal(request: Request, call_id: str, signal_data: WebRTC
 
 
 @router.get("/webrtc-config")
-async def get_webrtc_config(request: Request):
+def get_webrtc_config(user: Dict = Depends(get_current_user)):
     """Get WebRTC configuration including TURN servers."""
-    await get_current_user(request)
     return {"iceServers": settings.TURN_SERVERS}
 
 
 @router.get("/history")
-async def get_call_history(request: Request, limit: int = 20):
+async def get_call_history(limit: int = 20, user: Dict = Depends(get_current_user)):
     """Get call history for current user."""
-    user = await get_current_user(request)
     db = get_database()
     
-    calls = await db.call_sessions.find(
-        {"$or": [{"caller_id": user["user_id"]}, {"receiver_id": user["user_id"]}]},
-        {"_id": 0}
-    ).sort("created_at", -1).limit(limit).to_list(limit)
+    # Query each side on its own compound index, then merge the sorted results
+    outgoing, incoming = await asyncio.gather(
+        db.call_sessions.find(
+            {"caller_id": user["user_id"]}, {"_id": 0}
+        ).sort("created_at", -1).limit(limit).to_list(limit),
+        db.call_sessions.find(
+            {"receiver_id": user["user_id"]}, {"_id": 0}
+        ).sort("created_at", -1).limit(limit).to_list(limit),
+    )
     
-    return calls
+    calls = merge_call_history(outgoing, incoming, limit)
+    
+    # Hydrate participant details with a single batched lookup
+    participant_ids = {c["caller_id"] for c in calls} | {c["receiver_id"] for c in calls}
+    participants = {}
+    if participant_ids:
+        participants = {
+            u["user_id"]: u
+            async for u in db.users.find(
+                {"user_id": {"$in": list(participant_ids)}},
+                {"_id": 0, "user_id": 1, "full_name": 1, "avatar_url": 1}
+            )
+        }
+    
+    for call in calls:
+        call["caller"] = participants.get(call["caller_id"])
+        call["receiver"] = participants.get(call["receiver_id"])
+    
+    return ORJSONResponse(calls)
@@ -1,8 +1,9 @@
 """
 Application configuration management.
 """
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -14,10 +15,27 @@ class Settings(BaseSettings):
     APP_NAME: str = "EduAdvise - International Student Counseling Platform"
     DEBUG: bool = False
     API_PREFIX: str = "/api"
+    # Uvicorn worker processes. WebSocket connections and rooms, the JWT user
+    # cache and the new-message email debounce live in process memory, so
+    # with more than one worker, users on different workers can't reach each
+    # other in real time. Keep this at 1 until that state is shared.
+    WORKERS: int = 1
+    # Maximum concurrent connections per worker before uvicorn answers 503.
+    # Open WebSocket connections count toward it, so leave unset unless the
+    # limit is sized for the expected number of online chat clients.
+    LIMIT_CONCURRENCY: Optional[int] = None
     
     # MongoDB
     MONGO_URL: str = Field(..., description="MongoDB connection URL")
     DB_NAME: str = Field(..., description="MongoDB database name")
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 5
+    MONGO_MAX_IDLE_TIME_MS: int = 30000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 3000
+    # Wire compression; zstd needs the zstandard package from requirements.txt
+    MONGO_COMPRESSORS: str = "zstd"
+    # Buffer message/reminder inserts and write them unacknowledged (w=0)
+    BATCHED_WRITES: bool = False
     
     # JWT
     JWT_SECRET: str = Field(
@@ -26,6 +44,8 @@ class Settings(BaseSettings):
     )
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 168  # 7 days
+    # Processes per app worker for password hashing (each argon2 hash uses 64 MiB)
+    PASSWORD_HASH_WORKERS: int = 2
     
     # Google Calendar (Optional)
     GOOGLE_CALENDAR_CLIENT_ID: str = ""
@@ -49,8 +69,8 @@ class Settings(BaseSettings):
     # File Upload
     UPLOAD_DIR: Path = Field(default=Path("uploads"))
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
-    ALLOWED_EXTENSIONS: set = {'.pdf', '.doc', '.docx', '.jpg', '.jpeg', 
-                                '.png', '.gif', '.txt', '.xlsx', '.xls'}
+    ALLOWED_EXTENSIONS: frozenset[str] = frozenset({'.pdf', '.doc', '.docx', '.jpg', '.jpeg', 
+                                                    '.png', '.gif', '.txt', '.xlsx', '.xls'})
     
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -66,8 +86,14 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
+@lru_cache
+def get_settings() -> Settings:
+    """Get the cached settings instance for dependency injection."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 # Ensure upload directory exists
 settings.UPLOAD_DIR.mkdir(exist_ok=True)
@@ -1,8 +1,11 @@
 """
 Database connection and initialization.
 """
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import WriteConcern
 from app.core.config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,35 +15,204 @@ class Database:
     """MongoDB database connection manager."""
     
     client: AsyncIOMotorClient = None
+    db: AsyncIOMotorDatabase = None
     
     @classmethod
     async def connect_db(cls):
         """Connect to MongoDB."""
         try:
-            cls.client = AsyncIOMotorClient(settings.MONGO_URL)
+            cls.client = AsyncIOMotorClient(
+                settings.MONGO_URL,
+                tz_aware=True,
+                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+                serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                retryWrites=True,
+                compressors=settings.MONGO_COMPRESSORS
+            )
+            cls.db = cls.client[settings.DB_NAME]
             # Test connection
             await cls.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB")
+            await cls.create_indexes()
         except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
+            logger.error("Failed to connect to MongoDB: %s", e)
             raise
     
+    @classmethod
+    async def create_indexes(cls):
+        """Create indexes backing the hot query paths."""
+        db = cls.db
+        await db.users.create_index("email", unique=True, background=True)
+        await db.users.create_index("user_id", unique=True, background=True)
+        await db.call_sessions.create_index("call_id", unique=True, background=True)
+        await db.call_sessions.create_index(
+            [("caller_id", 1), ("created_at", -1)], background=True
+        )
+        await db.call_sessions.create_index(
+            [("receiver_id", 1), ("created_at", -1)], background=True
+        )
+        await db.uploaded_files.create_index("stored_name", unique=True, background=True)
+        await db.messages.create_index(
+            [("conversation_id", 1), ("created_at", -1)], background=True
+        )
+        await db.messages.create_index(
+            [("conversation_id", 1), ("receiver_id", 1), ("is_read", 1)], background=True
+        )
+        await db.conversations.create_index(
+            [("participants", 1), ("updated_at", -1)], background=True
+        )
+        await db.conversations.create_index("conversation_id", unique=True, background=True)
+        await db.reminders.create_index(
+            [("is_sent", 1), ("reminder_time", 1)], background=True
+        )
+        await db.reminders.create_index(
+            [("user_id", 1), ("is_read", 1), ("reminder_time", 1)], background=True
+        )
+        logger.info("Database indexes ensured")
+    
     @classmethod
     async def close_db(cls):
         """Close MongoDB connection."""
         if cls.client:
             cls.client.close()
+            cls.client = None
+            cls.db = None
             logger.info("MongoDB connection closed")
     
     @classmethod
     def get_db(cls):
         """Get database instance."""
-        if not cls.client:
+        if cls.db is None:
             raise RuntimeError("Database not connected. Call connect_db() first.")
-        return cls.client[settings.DB_NAME]
+        return cls.db
 
 
 # Convenience function to get database
 def get_database():
     """Get database instance for dependency injection."""
     return Database.get_db()
+
+
+# Queued by BatchedInserter.stop() to end the background task
+_STOP = object()
+
+
+class BatchedInserter:
+    """
+    Buffers documents and writes them to a collection in batches.
+    
+    Documents are queued by ``append`` and flushed by a background task with
+    ``insert_many`` once ``batch_size`` documents are pending or
+    ``flush_interval`` seconds have passed since the first one arrived.
+    An optional ``write_concern`` (e.g. ``WriteConcern(w=0)``) trades
+    durability for throughput on the batch writes.
+    """
+    
+    _instances: List["BatchedInserter"] = []
+    
+    def __init__(
+        self,
+        collection_name: str,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        write_concern: Optional[WriteConcern] = None
+    ):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_concern = write_concern
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        BatchedInserter._instances.append(self)
+    
+    @classmethod
+    def start_all(cls):
+        """Start the background task of every inserter."""
+        for inserter in cls._instances:
+            inserter.start()
+    
+    @classmethod
+    async def stop_all(cls):
+        """Stop every inserter, flushing pending documents."""
+        for inserter in cls._instances:
+            await inserter.stop()
+    
+    async def append(self, doc: dict):
+        """Queue a document for insertion."""
+        await self._queue.put(doc)
+    
+    def start(self):
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background task and flush any pending documents."""
+        if self._task is not None:
+            # The task writes whatever it holds before exiting, so an
+            # in-flight batch is never cut short
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        await self.flush()
+    
+    async def flush(self):
+        """Write out all currently queued documents."""
+        while not self._queue.empty():
+            batch = []
+            self._take_pending(batch)
+            await self._write(batch)
+    
+    def _take_pending(self, batch: List[dict]) -> bool:
+        """
+        Move queued documents into ``batch`` without waiting.
+        
+        Returns:
+            True if the stop marker was reached
+        """
+        while len(batch) < self.batch_size:
+            try:
+                doc = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if doc is _STOP:
+                return True
+            batch.append(doc)
+        return False
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            doc = await self._queue.get()
+            if doc is _STOP:
+                break
+            batch = [doc]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                stopping = self._take_pending(batch)
+                remaining = deadline - loop.time()
+                if stopping or len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if doc is _STOP:
+                    stopping = True
+                    break
+                batch.append(doc)
+            await self._write(batch)
+    
+    async def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            collection = get_database()[self.collection_name]
+            if self.write_concern is not None:
+                collection = collection.with_options(write_concern=self.write_concern)
+            await collection.insert_many(batch, ordered=False)
+        except Exception as e:
+            logger.error("Failed to write %d documents to %s: %s", len(batch), self.collection_name, e)
@@ -2,12 +2,70 @@
 Email notification service for user communications.
 """
 from datetime import datetime, timezone
-from app.core.database import get_database
-import uuid
+from app.core.database import BatchedInserter
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Email logs are written in batches off the request path
+email_log_writer = BatchedInserter("email_logs")
+
+# Email body templates, formatted at send time
+_NEW_MESSAGE_TMPL = """
+Hello,
+
+You have a new message from {sender_name}:
+
+"{preview}"
+
+Log in to EduAdvise to read and reply.
+
+Best regards,
+EduAdvise Team
+        """
+
+_MISSED_CALL_TMPL = """
+Hello,
+
+You missed a {call_type} call from {caller_name} on EduAdvise.
+
+Log in to EduAdvise to connect with them.
+
+Best regards,
+EduAdvise Team
+        """
+
+_BOOKING_REMINDER_TMPL = """
+Hello {user_name},
+
+This is a reminder that your session is coming up:
+
+Service: {service_name}
+With: {other_party_name}
+Time: {session_time}
+
+{reminder_text}
+
+Best regards,
+EduAdvise Team
+        """
+
+_BOOKING_CONFIRMATION_TMPL = """
+Hello {user_name},
+
+Your booking has been confirmed!
+
+Service: {service_name}
+Counselor: {counselor_name}
+Time: {session_time}
+
+You will receive reminders 24 hours and 1 hour before your session.
+
+Best regards,
+EduAdvise Team
+        """
+
 
 class EmailNotificationService:
     """
@@ -32,18 +90,18 @@ class EmailNotificationService:
         Returns:
             Email log document
         """
-        db = get_database()
         email_log = {
-            "email_id": f"email_{uuid.uuid4().hex[:12]}",
+            "email_id": f"email_{secrets.token_hex(6)}",
             "to_email": to_email,
             "subject": subject,
             "body": body,
             "email_type": email_type,
             "status": "logged",  # In production: pending, sent, failed
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
-        await db.email_logs.insert_one(email_log)
-        logger.info(f"[EMAIL] To: {to_email} | Subject: {subject} | Type: {email_type}")
+        await email_log_writer.append(email_log)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[EMAIL] To: %s | Subject: %s | Type: %s", to_email, subject, email_type)
         return email_log
     
     @staticmethod
@@ -54,18 +112,10 @@ class EmailNotificationService:
     ) -> dict:
         """Send notification for new message."""
         subject = f"New message from {sender_name} - EduAdvise"
-        body = f"""
-Hello,
-
-You have a new message from {sender_name}:
-
-"{message_preview[:100]}{'...' if len(message_preview) > 100 else ''}"
-
-Log in to EduAdvise to read and reply.
-
-Best regards,
-EduAdvise Team
-        """
+        preview = message_preview[:100]
+        if len(message_preview) > 100:
+            preview += "..."
+        body = _NEW_MESSAGE_TMPL.format(sender_name=sender_name, preview=preview)
         return await EmailNotificationService.log_email(
             to_email, subject, body, "new_message"
         )
@@ -78,16 +128,7 @@ EduAdvise Team
     ) -> dict:
         """Send notification for missed call."""
         subject = f"Missed {call_type} call from {caller_name} - EduAdvise"
-        body = f"""
-Hello,
-
-You missed a {call_type} call from {caller_name} on EduAdvise.
-
-Log in to EduAdvise to connect with them.
-
-Best regards,
-EduAdvise Team
-        """
+        body = _MISSED_CALL_TMPL.format(call_type=call_type, caller_name=caller_name)
         return await EmailNotificationService.log_email(
             to_email, subject, body, "missed_call"
         )
@@ -108,20 +149,13 @@ EduAdvise Team
             if hours_before == 1 
             else 'Make sure you have prepared any questions or documents you want to discuss.'
         )
-        body = f"""
-Hello {user_name},
-
-This is a reminder that your session is coming up:
-
-Service: {service_name}
-With: {other_party_name}
-Time: {session_time}
-
-{reminder_text}
-
-Best regards,
-EduAdvise Team
-        """
+        body = _BOOKING_REMINDER_TMPL.format(
+            user_name=user_name,
+            service_name=service_name,
+            other_party_name=other_party_name,
+            session_time=session_time,
+            reminder_text=reminder_text
+        )
         return await EmailNotificationService.log_email(
             to_email, subject, body, f"reminder_{hours_before}h"
         )
@@ -136,20 +170,12 @@ EduAdvise Team
     ) -> dict:
         """Send booking confirmation notification."""
         subject = f"Booking Confirmed - {service_name} - EduAdvise"
-        body = f"""
-Hello {user_name},
-
-Your booking has been confirmed!
-
-Service: {service_name}
-Counselor: {counselor_name}
-Time: {session_time}
-
-You will receive reminders 24 hours and 1 hour before your session.
-
-Best regards,
-EduAdvise Team
-        """
+        body = _BOOKING_CONFIRMATION_TMPL.format(
+            user_name=user_name,
+            service_name=service_name,
+            counselor_name=counselor_name,
+            session_time=session_time
+        )
         return await EmailNotificationService.log_email(
             to_email, subject, body, "booking_confirmed"
         )
@@ -1,24 +1,64 @@
 """
 File upload and download routes.
 """
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File as FastAPIFile, Response
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File as FastAPIFile, Response
+from fastapi.responses import FileResponse
 from app.core.database import get_database
 from app.core.security import get_current_user
 from app.core.config import settings
 from pathlib import Path
 from datetime import datetime, timezone
-import uuid
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping
+import secrets
 import aiofiles
+from cachetools import LRUCache
+from aiofiles import os as aos
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/files", tags=["Files"])
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+_MAX_MB = settings.MAX_FILE_SIZE // (1024 * 1024)
+
+# stored_name -> (content_type, original_name); stored names are unique and
+# their metadata never changes, so entries never need invalidating
+_file_meta_cache: LRUCache = LRUCache(maxsize=4096)
+
+
+def _is_not_modified(request_headers: Mapping[str, str], response_headers: Mapping[str, str]) -> bool:
+    """
+    Check whether a conditional GET can be answered with 304 Not Modified.
+    
+    If-None-Match takes precedence and compares ETags weakly, so ``W/``
+    prefixes are ignored and any tag in a comma-separated list matches.
+    If-Modified-Since is only consulted when If-None-Match is absent.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        etag = response_headers["etag"].removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+        )
+    
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(response_headers["last-modified"]) <= since
+
 
 @router.post("/upload")
-async def upload_file(request: Request, file: UploadFile = FastAPIFile(...)):
+async def upload_file(file: UploadFile = FastAPIFile(...), user: Dict = Depends(get_current_user)):
     """Upload a file for chat sharing."""
-    user = await get_current_user(request)
     db = get_database()
     
     # Validate file extension
@@ -29,32 +69,36 @@ async def upload_file(request: Request, file: UploadFile = FastAPIFile(...)):
             detail=f"File type not allowed. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
-    # Read and validate file size
-    contents = await file.read()
-    if len(contents) > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    
     # Generate unique filename
-    file_id = f"file_{uuid.uuid4().hex[:12]}"
+    file_id = f"file_{secrets.token_hex(6)}"
     safe_filename = f"{file_id}{file_ext}"
     file_path = settings.UPLOAD_DIR / safe_filename
     
-    # Save file
+    # Stream file to disk in chunks, validating size as we go
+    total_size = 0
     async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(contents)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            total_size += len(chunk)
+            if total_size > settings.MAX_FILE_SIZE:
+                break
+            await f.write(chunk)
+    
+    if total_size > settings.MAX_FILE_SIZE:
+        await aos.remove(file_path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {_MAX_MB}MB"
+        )
     
     # Store file metadata in database
     file_doc = {
         "file_id": file_id,
         "original_name": file.filename,
         "stored_name": safe_filename,
-        "size": len(contents),
+        "size": total_size,
         "content_type": file.content_type,
         "uploaded_by": user["user_id"],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     await db.uploaded_files.insert_one(file_doc)
     file_doc.pop("_id", None)
@@ -62,23 +106,51 @@ async def upload_file(request: Request, file: UploadFile = FastAPIFile(...)):
     # Return file URL
     file_doc["url"] = f"/api/files/{safe_filename}"
     
-    logger.info(f"File uploaded: {safe_filename} by user {user['user_id']}")
+    logger.info("File uploaded: %s by user %s", safe_filename, user['user_id'])
     return file_doc
 
 
 @router.get("/{filename}")
-async def get_file(filename: str):
+async def get_file(request: Request, filename: str):
     """Serve uploaded files."""
     file_path = settings.UPLOAD_DIR / filename
-    if not file_path.exists():
+    if not await aos.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Get content type from database
-    db = get_database()
-    file_doc = await db.uploaded_files.find_one({"stored_name": filename}, {"_id": 0})
-    content_type = file_doc["content_type"] if file_doc else "application/octet-stream"
+    # Get content type from cache, falling back to the database
+    file_meta = _file_meta_cache.get(filename)
+    if file_meta is None:
+        db = get_database()
+        file_doc = await db.uploaded_files.find_one(
+            {"stored_name": filename},
+            {"_id": 0, "content_type": 1, "original_name": 1}
+        ) or {}
+        file_meta = (
+            file_doc.get("content_type") or "application/octet-stream",
+            file_doc.get("original_name")
+        )
+        # Only cache real metadata; the upload record may not be written yet
+        if file_doc:
+            _file_meta_cache[filename] = file_meta
+    content_type, original_name = file_meta
     
-    async with aiofiles.open(file_path, 'rb') as f:
-        content = await f.read()
+    # FileResponse streams via sendfile and sets ETag/Last-Modified headers
+    response = FileResponse(
+        path=file_path,
+        media_type=content_type,
+        filename=original_name,
+        stat_result=await aos.stat(file_path),
+        content_disposition_type="inline"
+    )
+    
+    # Honour conditional requests so repeat downloads return 304
+    if _is_not_modified(request.headers, response.headers):
+        return Response(
+            status_code=304,
+            headers={
+                "etag": response.headers["etag"],
+                "last-modified": response.headers["last-modified"]
+            }
+        )
     
-    return Response(content=content, media_type=content_type)
+    return response
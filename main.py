@@ -2,12 +2,14 @@
 Main FastAPI application.
 """
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
-from app.core.database import Database
+from app.core.database import Database, BatchedInserter
+from app.core.security import start_hash_pool, shutdown_hash_pool
 from app.routers import (
     auth_router,
     messages_router,
@@ -19,7 +21,8 @@ from app.utils.websocket_handler import websocket_endpoint
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
 
@@ -31,14 +34,18 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Starting application...")
+    start_hash_pool()
     await Database.connect_db()
+    BatchedInserter.start_all()
     logger.info("Application started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await BatchedInserter.stop_all()
     await Database.close_db()
+    shutdown_hash_pool()
     logger.info("Application shut down successfully")
 
 
@@ -47,7 +54,8 @@ app = FastAPI(
     title=settings.APP_NAME,
     description="International Student Counseling Platform API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -94,9 +102,20 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    if settings.DEBUG:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=settings.WORKERS,
+            loop="uvloop",
+            http="httptools",
+            reload=False
+        )
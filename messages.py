@@ -1,54 +1,97 @@
 """
 Messaging and chat routes.
 """
-from fastapi import APIRouter, HTTPException, Request
-from app.core.database import get_database
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from cachetools import TTLCache
+from pymongo import WriteConcern
+from app.core.config import settings
+from app.core.database import BatchedInserter, get_database
 from app.core.security import get_current_user
 from app.schemas.messages import MessageCreate, MessageResponse, ConversationResponse
 from app.services.websocket import manager
 from app.services.email import email_service
 from datetime import datetime, timezone
-import uuid
+from typing import Dict
+import asyncio
+import hashlib
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
+# Used instead of insert_one when settings.BATCHED_WRITES is enabled
+message_inserter = BatchedInserter(
+    "messages", batch_size=1000, write_concern=WriteConcern(w=0)
+)
+
+# Receivers emailed about a new message recently; further messages within
+# the window don't trigger another email
+NEW_MESSAGE_EMAIL_DEBOUNCE_SECONDS = 5 * 60
+_recently_emailed: TTLCache = TTLCache(maxsize=10_000, ttl=NEW_MESSAGE_EMAIL_DEBOUNCE_SECONDS)
+
+
+def dm_conversation_id(user_a: str, user_b: str) -> str:
+    """
+    Derive the conversation ID for a direct conversation between two users.
+    
+    The ID is symmetric in its arguments, so a conversation can be found
+    with a direct key lookup instead of matching on participants.
+    """
+    pair = ":".join(sorted((user_a, user_b)))
+    return "conv_" + hashlib.blake2b(pair.encode(), digest_size=8).hexdigest()
+
 
 @router.post("/send", response_model=MessageResponse)
-async def send_message(request: Request, message_data: MessageCreate):
+async def send_message(
+    message_data: MessageCreate,
+    background_tasks: BackgroundTasks,
+    user: Dict = Depends(get_current_user)
+):
     """Send a message to another user."""
-    user = await get_current_user(request)
     db = get_database()
     
     # Verify receiver exists
-    receiver = await db.users.find_one({"user_id": message_data.receiver_id}, {"_id": 0})
+    receiver = await db.users.find_one(
+        {"user_id": message_data.receiver_id},
+        {"_id": 0, "email": 1}
+    )
     if not receiver:
         raise HTTPException(status_code=404, detail="Receiver not found")
     
-    # Create or get conversation
-    conv_query = {
-        "participants": {
-            "$all": [user["user_id"], message_data.receiver_id]
-        }
-    }
-    conversation = await db.conversations.find_one(conv_query, {"_id": 0})
+    now = datetime.now(timezone.utc).isoformat()
+    message_id = f"msg_{secrets.token_hex(6)}"
     
-    if not conversation:
-        conversation_id = f"conv_{uuid.uuid4().hex[:12]}"
-        conversation = {
-            "conversation_id": conversation_id,
-            "participants": [user["user_id"], message_data.receiver_id],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.conversations.insert_one(conversation)
-    else:
-        conversation_id = conversation["conversation_id"]
+    # Get or create the conversation, bump updated_at, the last message and
+    # the receiver's unread counter in one keyed upsert
+    conversation_id = dm_conversation_id(user["user_id"], message_data.receiver_id)
+    await db.conversations.update_one(
+        {"conversation_id": conversation_id},
+        {
+            "$set": {
+                "updated_at": now,
+                "last_message": {
+                    "message_id": message_id,
+                    "sender_id": user["user_id"],
+                    "receiver_id": message_data.receiver_id,
+                    "content": message_data.content,
+                    "file_url": message_data.file_url,
+                    "file_name": message_data.file_name,
+                    "created_at": now
+                }
+            },
+            "$inc": {f"unread_counts.{message_data.receiver_id}": 1},
+            "$setOnInsert": {
+                "participants": [user["user_id"], message_data.receiver_id],
+                "created_at": now
+            }
+        },
+        upsert=True
+    )
     
     # Create message
     message = {
-        "message_id": f"msg_{uuid.uuid4().hex[:12]}",
+        "message_id": message_id,
         "conversation_id": conversation_id,
         "sender_id": user["user_id"],
         "receiver_id": message_data.receiver_id,
@@ -56,37 +99,40 @@ async def send_message(request: Request, message_data: MessageCreate):
         "file_url": message_data.file_url,
         "file_name": message_data.file_name,
         "is_read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": now
     }
     
-    await db.messages.insert_one(message)
-    await db.conversations.update_one(
-        {"conversation_id": conversation_id},
-        {"$set": {"updated_at": message["created_at"]}}
-    )
+    # Insert a copy so the driver's _id doesn't leak into the outgoing payload
+    if settings.BATCHED_WRITES:
+        insert = message_inserter.append(dict(message))
+    else:
+        insert = db.messages.insert_one(dict(message))
     
-    # Send via WebSocket if receiver is online
+    # Send via WebSocket if receiver is online, otherwise email them after the
+    # response, at most once per debounce window
     if manager.is_user_online(message_data.receiver_id):
-        await manager.send_personal_message({
+        await asyncio.gather(insert, manager.send_personal_message({
             "type": "new_message",
             "message": message
-        }, message_data.receiver_id)
+        }, message_data.receiver_id))
     else:
-        # Send email notification
-        await email_service.send_new_message_notification(
-            receiver["email"],
-            user["full_name"],
-            message_data.content
-        )
+        await insert
+        if message_data.receiver_id not in _recently_emailed:
+            _recently_emailed[message_data.receiver_id] = True
+            background_tasks.add_task(
+                email_service.send_new_message_notification,
+                receiver["email"],
+                user["full_name"],
+                message_data.content
+            )
     
     message.pop("_id", None)
     return MessageResponse(**message)
 
 
 @router.get("/conversations", response_model=list[ConversationResponse])
-async def get_conversations(request: Request):
+async def get_conversations(user: Dict = Depends(get_current_user)):
     """Get all conversations for current user."""
-    user = await get_current_user(request)
     db = get_database()
     
     conversations = await db.conversations.find(
@@ -94,57 +140,51 @@ async def get_conversations(request: Request):
         {"_id": 0}
     ).sort("updated_at", -1).to_list(100)
     
+    # Last message and unread counters are maintained on the conversation
+    # document by send_message, so no per-conversation queries are needed
     result = []
     for conv in conversations:
-        # Get last message
-        last_msg = await db.messages.find_one(
-            {"conversation_id": conv["conversation_id"]},
-            {"_id": 0},
-            sort=[("created_at", -1)]
-        )
-        
-        # Count unread messages
-        unread_count = await db.messages.count_documents({
-            "conversation_id": conv["conversation_id"],
-            "receiver_id": user["user_id"],
-            "is_read": False
-        })
-        
-        conv["last_message"] = last_msg
-        conv["unread_count"] = unread_count
+        unread_counts = conv.pop("unread_counts", {})
+        last_message = conv.get("last_message")
+        if last_message:
+            # The last message is unread exactly while its receiver has unread messages
+            last_message["conversation_id"] = conv["conversation_id"]
+            last_message["is_read"] = unread_counts.get(last_message["receiver_id"], 0) == 0
+        conv["unread_count"] = unread_counts.get(user["user_id"], 0)
         result.append(ConversationResponse(**conv))
     
     return result
 
 
 @router.get("/conversations/{conversation_id}/messages")
-async def get_conversation_messages(request: Request, conversation_id: str, limit: int = 50):
+async def get_conversation_messages(conversation_id: str, limit: int = 50, user: Dict = Depends(get_current_user)):
     """Get messages from a conversation."""
-    user = await get_current_user(request)
     db = get_database()
     
-    # Verify user is part of conversation
-    conversation = await db.conversations.find_one({
-        "conversation_id": conversation_id,
-        "participants": user["user_id"]
-    })
+    # Check membership (resetting the unread counter), fetch messages and mark
+    # them read concurrently; the read update only touches messages addressed
+    # to this user, so it is safe to issue before the membership check resolves
+    conversation, messages, _ = await asyncio.gather(
+        db.conversations.find_one_and_update(
+            {"conversation_id": conversation_id, "participants": user["user_id"]},
+            {"$set": {f"unread_counts.{user['user_id']}": 0}},
+            projection={"_id": 1}
+        ),
+        db.messages.find(
+            {"conversation_id": conversation_id},
+            {"_id": 0}
+        ).sort("created_at", -1).limit(limit).to_list(limit),
+        db.messages.update_many(
+            {
+                "conversation_id": conversation_id,
+                "receiver_id": user["user_id"],
+                "is_read": False
+            },
+            {"$set": {"is_read": True}}
+        )
+    )
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    messages = await db.messages.find(
-        {"conversation_id": conversation_id},
-        {"_id": 0}
-    ).sort("created_at", -1).limit(limit).to_list(limit)
-    
-    # Mark messages as read
-    await db.messages.update_many(
-        {
-            "conversation_id": conversation_id,
-            "receiver_id": user["user_id"],
-            "is_read": False
-        },
-        {"$set": {"is_read": True}}
-    )
-    
     return messages[::-1]  # Reverse to chronological order
@@ -0,0 +1,190 @@
+"""
+One-off migration for conversation documents.
+
+Brings conversations created by earlier versions in line with what
+send_message now expects:
+
+- conversation_id: rekeyed to the ID derived from the participants, together
+  with the conversation_id of their messages
+- unread_counts: per-user unread message counters
+- last_message: a copy of the newest message
+
+Each step only touches documents that still need it, so the script is safe
+to re-run. Run it once before starting the new version:
+
+    python migrate_conversations.py
+"""
+from collections import defaultdict
+from pathlib import Path
+from pymongo import UpdateOne
+import asyncio
+import logging
+import sys
+
+# Add project root to Python path
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.database import Database, get_database  # noqa: E402
+from app.routers.messages import dm_conversation_id  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Conversations handled per aggregation and bulk write
+CHUNK_SIZE = 1000
+
+# Message fields copied into conversations.last_message, as send_message stores them
+LAST_MESSAGE_FIELDS = (
+    "message_id",
+    "sender_id",
+    "receiver_id",
+    "content",
+    "file_url",
+    "file_name",
+    "created_at",
+)
+
+
+async def _missing_field_chunks(db, field: str):
+    """Yield lists of IDs of conversations that lack ``field``."""
+    chunk = []
+    async for conv in db.conversations.find(
+        {field: {"$exists": False}},
+        {"_id": 0, "conversation_id": 1}
+    ):
+        chunk.append(conv["conversation_id"])
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def migrate_conversation_ids(db) -> int:
+    """
+    Rekey direct conversations to the ID derived from their participants.
+    
+    Messages are moved along with their conversation. If a conversation
+    already exists under the derived ID (started while the legacy one was not
+    yet migrated), the two are merged, and the merged conversation's
+    unread_counts and last_message are dropped so the backfill steps rebuild
+    them from the combined history.
+    
+    Returns:
+        Number of conversations rekeyed or merged
+    """
+    migrated = 0
+    async for conv in db.conversations.find(
+        {},
+        {"_id": 0, "conversation_id": 1, "participants": 1, "created_at": 1, "updated_at": 1}
+    ):
+        participants = conv.get("participants") or []
+        if len(participants) != 2:
+            continue
+        old_id = conv["conversation_id"]
+        new_id = dm_conversation_id(*participants)
+        if old_id == new_id:
+            continue
+        
+        # Messages first, so an interrupted run leaves the legacy conversation
+        # in place to be picked up again
+        await db.messages.update_many(
+            {"conversation_id": old_id},
+            {"$set": {"conversation_id": new_id}}
+        )
+        if await db.conversations.find_one({"conversation_id": new_id}, {"_id": 1}):
+            update = {"$unset": {"unread_counts": "", "last_message": ""}}
+            if conv.get("created_at"):
+                update["$min"] = {"created_at": conv["created_at"]}
+            if conv.get("updated_at"):
+                update["$max"] = {"updated_at": conv["updated_at"]}
+            await db.conversations.update_one({"conversation_id": new_id}, update)
+            await db.conversations.delete_one({"conversation_id": old_id})
+        else:
+            await db.conversations.update_one(
+                {"conversation_id": old_id},
+                {"$set": {"conversation_id": new_id}}
+            )
+        migrated += 1
+    return migrated
+
+
+async def backfill_unread_counts(db) -> int:
+    """
+    Rebuild unread_counts from the unread messages of each conversation.
+    
+    Returns:
+        Number of conversations updated
+    """
+    updated = 0
+    async for conversation_ids in _missing_field_chunks(db, "unread_counts"):
+        counts = defaultdict(dict)
+        async for row in db.messages.aggregate([
+            {"$match": {"conversation_id": {"$in": conversation_ids}, "is_read": False}},
+            {"$group": {
+                "_id": {"conversation_id": "$conversation_id", "receiver_id": "$receiver_id"},
+                "count": {"$sum": 1}
+            }}
+        ]):
+            counts[row["_id"]["conversation_id"]][row["_id"]["receiver_id"]] = row["count"]
+        result = await db.conversations.bulk_write([
+            UpdateOne(
+                {"conversation_id": conversation_id, "unread_counts": {"$exists": False}},
+                {"$set": {"unread_counts": counts.get(conversation_id, {})}}
+            )
+            for conversation_id in conversation_ids
+        ], ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def backfill_last_messages(db) -> int:
+    """
+    Copy the newest message of each conversation onto it as last_message.
+    
+    Conversations without messages get a null last_message, so they are not
+    picked up again on the next run.
+    
+    Returns:
+        Number of conversations updated
+    """
+    updated = 0
+    async for conversation_ids in _missing_field_chunks(db, "last_message"):
+        last_messages = {}
+        async for row in db.messages.aggregate([
+            {"$match": {"conversation_id": {"$in": conversation_ids}}},
+            {"$sort": {"conversation_id": 1, "created_at": -1}},
+            {"$group": {
+                "_id": "$conversation_id",
+                "last_message": {"$first": "$$ROOT"}
+            }}
+        ]):
+            last_messages[row["_id"]] = {
+                field: row["last_message"].get(field) for field in LAST_MESSAGE_FIELDS
+            }
+        result = await db.conversations.bulk_write([
+            UpdateOne(
+                {"conversation_id": conversation_id, "last_message": {"$exists": False}},
+                {"$set": {"last_message": last_messages.get(conversation_id)}}
+            )
+            for conversation_id in conversation_ids
+        ], ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def main():
+    """Run every migration step in order."""
+    await Database.connect_db()
+    try:
+        db = get_database()
+        logger.info("Rekeyed %d conversations", await migrate_conversation_ids(db))
+        logger.info("Backfilled unread counts on %d conversations", await backfill_unread_counts(db))
+        logger.info("Backfilled last message on %d conversations", await backfill_last_messages(db))
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -1,15 +1,24 @@
 """
 In-app reminder service for booking notifications.
 """
+from collections import defaultdict
 from datetime import datetime, timezone
 from typing import List
-from app.core.database import get_database
+from pymongo import WriteConcern
+from app.core.config import settings
+from app.core.database import BatchedInserter, get_database
 from app.services.websocket import manager
-import uuid
+import asyncio
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Used instead of insert_one when settings.BATCHED_WRITES is enabled
+reminder_inserter = BatchedInserter(
+    "reminders", batch_size=1000, write_concern=WriteConcern(w=0)
+)
+
 
 class ReminderService:
     """Service to manage in-app reminders and notifications."""
@@ -37,7 +46,7 @@ class ReminderService:
         """
         db = get_database()
         reminder = {
-            "reminder_id": f"reminder_{uuid.uuid4().hex[:12]}",
+            "reminder_id": f"reminder_{secrets.token_hex(6)}",
             "user_id": user_id,
             "booking_id": booking_id,
             "reminder_time": reminder_time.isoformat(),
@@ -47,8 +56,11 @@ class ReminderService:
             "is_read": False,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.reminders.insert_one(reminder)
-        logger.info(f"Created reminder {reminder['reminder_id']} for user {user_id}")
+        if settings.BATCHED_WRITES:
+            await reminder_inserter.append(dict(reminder))
+        else:
+            await db.reminders.insert_one(reminder)
+        logger.info("Created reminder %s for user %s", reminder['reminder_id'], user_id)
         return reminder
     
     @staticmethod
@@ -82,7 +94,7 @@ class ReminderService:
             {"reminder_id": reminder_id},
             {"$set": {"is_read": True}}
         )
-        logger.info(f"Marked reminder {reminder_id} as read")
+        logger.info("Marked reminder %s as read", reminder_id)
     
     @staticmethod
     async def send_reminder_to_user(reminder: dict):
@@ -107,7 +119,7 @@ class ReminderService:
             {"reminder_id": reminder["reminder_id"]},
             {"$set": {"is_sent": True}}
         )
-        logger.info(f"Sent reminder {reminder['reminder_id']} to user {user_id}")
+        logger.info("Sent reminder %s to user %s", reminder['reminder_id'], user_id)
     
     @staticmethod
     async def process_due_reminders():
@@ -126,13 +138,44 @@ class ReminderService:
                 "is_sent": False
             },
             {"_id": 0}
-        ).to_list(100)
+        ).limit(1000).to_list(1000)
+        
+        if not due_reminders:
+            return
         
+        # Deliver one combined payload per online user, concurrently
+        by_user = defaultdict(list)
         for reminder in due_reminders:
-            try:
-                await ReminderService.send_reminder_to_user(reminder)
-            except Exception as e:
-                logger.error(f"Error sending reminder {reminder['reminder_id']}: {e}")
+            if manager.is_user_online(reminder["user_id"]):
+                by_user[reminder["user_id"]].append(reminder)
+        
+        user_ids = list(by_user)
+        results = await asyncio.gather(
+            *(
+                manager.send_personal_message({
+                    "type": "reminders",
+                    "items": by_user[user_id]
+                }, user_id, raise_on_error=True)
+                for user_id in user_ids
+            ),
+            return_exceptions=True
+        )
+        
+        failed_ids = set()
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                failed_ids.update(r["reminder_id"] for r in by_user[user_id])
+                logger.error("Error sending reminders to user %s: %s", user_id, result)
+        
+        # Failed reminders stay unsent and are retried on the next run; mark
+        # everything else as sent in a single write
+        sent_ids = [r["reminder_id"] for r in due_reminders if r["reminder_id"] not in failed_ids]
+        if sent_ids:
+            await db.reminders.update_many(
+                {"reminder_id": {"$in": sent_ids}},
+                {"$set": {"is_sent": True}}
+            )
+        logger.info("Sent %d due reminders", len(sent_ids))
 
 
 # Global reminder service instance
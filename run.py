@@ -2,7 +2,11 @@
 Application startup script.
 
 This script provides an easy way to run the application with proper configuration.
+Set DEV=1 to run a single auto-reloading worker for local development.
+The production worker count comes from the WORKERS setting (default 1, see
+app/core/config.py for why).
 """
+import os
 import uvicorn
 import sys
 from pathlib import Path
@@ -14,11 +18,30 @@ sys.path.insert(0, str(ROOT_DIR))
 
 def main():
     """Run the FastAPI application."""
+    from app.core.config import settings
+    
+    if os.environ.get("DEV") == "1":
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info",
+            access_log=True,
+        )
+        return
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,  # Set to False in production
+        reload=False,
+        workers=settings.WORKERS,
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=settings.LIMIT_CONCURRENCY,
+        backlog=2048,
+        timeout_keep_alive=30,
         log_level="info",
         access_log=True,
     )
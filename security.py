@@ -1,8 +1,18 @@
 """
 Security utilities for authentication and authorization.
 """
+import asyncio
 import bcrypt
+import hmac
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
 import jwt
+import multiprocessing
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict
 from fastapi import HTTPException, Request, Depends
@@ -12,19 +22,140 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Recently verified (password fingerprint, stored hash) pairs. Passwords are
+# keyed by an HMAC with a per-process pepper so plaintext is never retained.
+_VERIFY_CACHE_MAXSIZE = 1024
+_VERIFY_CACHE_TTL_SECONDS = 300
+_PEPPER = secrets.token_bytes(32)
+_verify_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Fields handlers need from the authenticated user; full profiles are
+# loaded explicitly where required
+_CURRENT_USER_PROJ = {
+    "_id": 0,
+    "user_id": 1,
+    "email": 1,
+    "user_type": 1,
+    "full_name": 1,
+    "is_active": 1,
+}
+
+# JWT -> user lookups, so repeat requests within the TTL skip the database
+_USER_CACHE_TTL_SECONDS = 30
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_USER_CACHE_TTL_SECONDS)
+
+# New passwords are hashed with argon2id; bcrypt hashes are still accepted
+# and upgraded on the next successful login.
+_PH = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+# Password hashing is CPU-bound, so it runs in worker processes to keep the
+# event loop free during login bursts. The pool is started by the app
+# lifespan; until then hashing falls back to the default thread pool.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_hash_pool():
+    """
+    Start the password hashing process pool.
+    
+    Workers come from a forkserver so they don't inherit the driver's
+    threads and sockets from the already-running app process.
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+
+
+def shutdown_hash_pool():
+    """Shut down the password hashing process pool."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+
+def _password_fingerprint(password: str) -> bytes:
+    """Return a keyed digest of a password for use as a cache key."""
+    return hmac.new(_PEPPER, password.encode('utf-8'), 'sha256').digest()
+
+
+def _verify_cached(hmac_key: bytes, stored_hash: str) -> Optional[bool]:
+    """Look up a cached verification verdict, evicting it if expired."""
+    entry = _verify_cache.get((hmac_key, stored_hash))
+    if entry is None:
+        return None
+    verdict, expires_at = entry
+    if time.monotonic() >= expires_at:
+        _verify_cache.pop((hmac_key, stored_hash), None)
+        return None
+    _verify_cache.move_to_end((hmac_key, stored_hash))
+    return verdict
+
+
+def _hash_password(password: str) -> str:
+    """Hash a password using argon2id."""
+    return _PH.hash(password)
+
+
+def _check_password(password: str, hashed: str) -> bool:
+    """Verify a password against an argon2 or legacy bcrypt hash."""
+    if hashed.startswith("$argon2"):
+        try:
+            return _PH.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def _store_verdict(hmac_key: bytes, stored_hash: str, verdict: bool):
+    """Cache a verification verdict, evicting the least recently used entry."""
+    _verify_cache[(hmac_key, stored_hash)] = (
+        verdict, time.monotonic() + _VERIFY_CACHE_TTL_SECONDS
+    )
+    _verify_cache.move_to_end((hmac_key, stored_hash))
+    while len(_verify_cache) > _VERIFY_CACHE_MAXSIZE:
+        _verify_cache.popitem(last=False)
+
 
 class Security:
     """Security utilities for password hashing and JWT tokens."""
     
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hash a password using bcrypt."""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    async def hash_password(password: str) -> str:
+        """Hash a password using argon2id in the hashing process pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_pool, _hash_password, password)
     
     @staticmethod
-    def verify_password(password: str, hashed: str) -> bool:
-        """Verify a password against its hash."""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    async def verify_password(password: str, hashed: str) -> bool:
+        """
+        Verify a password against its hash in the hashing process pool.
+        
+        Verdicts are cached briefly so repeated logins skip the hashing work.
+        """
+        hmac_key = _password_fingerprint(password)
+        verdict = _verify_cached(hmac_key, hashed)
+        if verdict is None:
+            loop = asyncio.get_running_loop()
+            verdict = await loop.run_in_executor(_hash_pool, _check_password, password, hashed)
+            _store_verdict(hmac_key, hashed, verdict)
+        return verdict
+    
+    @staticmethod
+    def needs_rehash(hashed: str) -> bool:
+        """Check whether a stored hash should be upgraded to current argon2 parameters."""
+        if not hashed.startswith("$argon2"):
+            return True
+        return _PH.check_needs_rehash(hashed)
+    
+    @staticmethod
+    def invalidate_password_cache(hashed: str):
+        """Drop cached verdicts for a stored hash (e.g. after a password change)."""
+        for key in [k for k in _verify_cache if hmac.compare_digest(k[1], hashed)]:
+            _verify_cache.pop(key, None)
     
     @staticmethod
     def create_jwt_token(user_id: str, email: str, user_type: str) -> str:
@@ -48,23 +179,36 @@ class Security:
             logger.warning("JWT token has expired")
             return None
         except jwt.InvalidTokenError as e:
-            logger.warning(f"Invalid JWT token: {e}")
+            logger.warning("Invalid JWT token: %s", e)
             return None
 
 
+def invalidate_user_cache(user_id: str):
+    """Drop cached lookups for a user (e.g. after a profile or password change)."""
+    for token in [t for t, u in list(_user_cache.items()) if u.get("user_id") == user_id]:
+        _user_cache.pop(token, None)
+
+
 async def get_current_user(request: Request) -> Dict:
     """
     Dependency function to get current authenticated user from request.
     
+    The resolved user is memoized on ``request.state`` so repeated calls
+    within the same request do not hit the database again, and cached per
+    token for a short TTL across requests.
+    
     Args:
         request: FastAPI request object
         
     Returns:
-        User dictionary with user_id, email, and user_type
+        User dictionary with user_id, email, user_type, full_name and is_active
         
     Raises:
         HTTPException: If authentication fails
     """
+    if hasattr(request.state, "user"):
+        return request.state.user
+    
     auth_header = request.headers.get("Authorization")
     
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -76,13 +220,18 @@ async def get_current_user(request: Request) -> Dict:
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    # Verify user still exists in database
-    db = get_database()
-    user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0, "password": 0})
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    # Verify user still exists in database, unless recently looked up
+    user = _user_cache.get(token)
+    if user is None:
+        db = get_database()
+        user = await db.users.find_one({"user_id": payload["user_id"]}, _CURRENT_USER_PROJ)
+        
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        _user_cache[token] = user
     
+    request.state.user = user
     return user
 
 
@@ -0,0 +1,47 @@
+"""
+Tests for call history helpers.
+"""
+from datetime import datetime, timezone
+from app.routers.calls import merge_call_history
+
+
+def test_merge_call_history_mixes_legacy_and_native_timestamps():
+    """Legacy ISO-string sessions merge with native datetime sessions."""
+    new_call = {
+        "call_id": "call_new",
+        "created_at": datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc),
+    }
+    legacy_call = {
+        "call_id": "call_legacy",
+        "created_at": "2025-01-01T09:30:00+00:00",
+    }
+
+    calls = merge_call_history([new_call], [legacy_call], limit=10)
+
+    assert [c["call_id"] for c in calls] == ["call_new", "call_legacy"]
+
+
+def _call(call_id, hour):
+    return {
+        "call_id": call_id,
+        "created_at": datetime(2026, 5, 1, hour, 0, tzinfo=timezone.utc),
+    }
+
+
+def test_merge_call_history_orders_newest_first_and_limits():
+    """Outgoing and incoming calls interleave by time and respect the limit."""
+    outgoing = [_call("call_out_2", 10), _call("call_out_1", 8)]
+    incoming = [_call("call_in_2", 9), _call("call_in_1", 7)]
+
+    calls = merge_call_history(outgoing, incoming, limit=3)
+
+    assert [c["call_id"] for c in calls] == ["call_out_2", "call_in_2", "call_out_1"]
+
+
+def test_merge_call_history_drops_duplicates():
+    """A call where the user is both caller and receiver appears once."""
+    self_call = _call("call_self", 10)
+
+    calls = merge_call_history([self_call, _call("call_out", 8)], [dict(self_call)], limit=10)
+
+    assert [c["call_id"] for c in calls] == ["call_self", "call_out"]
@@ -0,0 +1,83 @@
+"""
+Tests for the batched insert buffer.
+"""
+import asyncio
+import pytest
+from app.core import database
+from app.core.database import BatchedInserter
+
+
+class FakeCollection:
+    """Records the batches passed to insert_many."""
+
+    def __init__(self):
+        self.batches = []
+        self.delay = 0
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(self.delay)
+        self.batches.append([doc["n"] for doc in docs])
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    """Route inserter writes to a fake collection."""
+    fake = FakeCollection()
+    monkeypatch.setattr(database, "get_database", lambda: {"items": fake})
+    monkeypatch.setattr(BatchedInserter, "_instances", [])
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full(collection):
+    """A full batch is written without waiting for the flush interval."""
+    inserter = BatchedInserter("items", batch_size=3, flush_interval=60)
+    inserter.start()
+    for n in range(4):
+        await inserter.append({"n": n})
+    await asyncio.sleep(0.01)
+
+    assert collection.batches == [[0, 1, 2]]
+
+    await inserter.stop()
+    assert collection.batches == [[0, 1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_flushes_after_interval(collection):
+    """A partial batch is written once the flush interval has passed."""
+    inserter = BatchedInserter("items", batch_size=100, flush_interval=0.02)
+    inserter.start()
+    await inserter.append({"n": 0})
+    await inserter.append({"n": 1})
+    await asyncio.sleep(0.1)
+
+    assert collection.batches == [[0, 1]]
+    await inserter.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_documents(collection):
+    """Documents still buffered when the inserter stops are written out."""
+    inserter = BatchedInserter("items", batch_size=2, flush_interval=60)
+    for n in range(5):
+        await inserter.append({"n": n})
+
+    await inserter.stop()
+
+    assert collection.batches == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_in_flight_write(collection):
+    """A batch already being written when the inserter stops is not dropped."""
+    collection.delay = 0.05
+    inserter = BatchedInserter("items", batch_size=2, flush_interval=60)
+    inserter.start()
+    for n in range(3):
+        await inserter.append({"n": n})
+    await asyncio.sleep(0.01)
+
+    await inserter.stop()
+
+    assert collection.batches == [[0, 1], [2]]
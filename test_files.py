@@ -0,0 +1,63 @@
+"""
+Tests for conditional file downloads.
+"""
+import pytest
+from starlette.requests import Request
+from app.core.config import settings
+from app.routers import files
+from app.routers.files import get_file
+
+
+@pytest.fixture
+def stored_file(tmp_path, monkeypatch):
+    """An uploaded file whose metadata is already cached."""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+    (tmp_path / "file_abc.pdf").write_bytes(b"%PDF-1.4")
+    files._file_meta_cache["file_abc.pdf"] = ("application/pdf", "notes.pdf")
+    yield "file_abc.pdf"
+    files._file_meta_cache.pop("file_abc.pdf", None)
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+@pytest.mark.asyncio
+async def test_weak_etag_in_list_returns_304(stored_file):
+    """A W/-prefixed ETag anywhere in If-None-Match is a match."""
+    response = await get_file(_request(), stored_file)
+    etag = response.headers["etag"]
+
+    cached = await get_file(_request(if_none_match=f'"other", W/{etag}'), stored_file)
+
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_if_modified_since_returns_304(stored_file):
+    """A copy as recent as Last-Modified is not sent again."""
+    response = await get_file(_request(), stored_file)
+
+    cached = await get_file(
+        _request(if_modified_since=response.headers["last-modified"]), stored_file
+    )
+
+    assert cached.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_if_none_match_takes_precedence(stored_file):
+    """A stale ETag is not overridden by a matching If-Modified-Since."""
+    response = await get_file(_request(), stored_file)
+
+    fresh = await get_file(
+        _request(if_none_match='"other"', if_modified_since=response.headers["last-modified"]),
+        stored_file
+    )
+
+    assert fresh.status_code == 200
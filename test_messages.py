@@ -0,0 +1,23 @@
+"""
+Tests for messaging helpers.
+"""
+from app.routers.messages import dm_conversation_id
+
+
+def test_dm_conversation_id_is_symmetric():
+    """Both participants derive the same conversation ID."""
+    assert dm_conversation_id("user_a", "user_b") == dm_conversation_id("user_b", "user_a")
+
+
+def test_dm_conversation_id_format():
+    """IDs keep the conv_ prefix used for all conversation IDs."""
+    conversation_id = dm_conversation_id("user_a", "user_b")
+
+    assert conversation_id.startswith("conv_")
+    assert len(conversation_id) == len("conv_") + 16
+
+
+def test_dm_conversation_id_differs_per_pair():
+    """Different pairs of users get different conversations."""
+    assert dm_conversation_id("user_a", "user_b") != dm_conversation_id("user_a", "user_c")
+    assert dm_conversation_id("user_a", "user_bc") != dm_conversation_id("user_ab", "user_c")
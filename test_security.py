@@ -0,0 +1,52 @@
+"""
+Tests for the password verification verdict cache.
+"""
+import pytest
+from app.core import security
+from app.core.security import _password_fingerprint, _store_verdict, _verify_cached
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Empty verdict cache and a controllable stand-in for time.monotonic."""
+    now = [100.0]
+    monkeypatch.setattr(security.time, "monotonic", lambda: now[0])
+    security._verify_cache.clear()
+    yield now
+    security._verify_cache.clear()
+
+
+def test_verdict_is_cached_until_ttl(clock):
+    """Cached verdicts are returned within the TTL and dropped after it."""
+    key = _password_fingerprint("secret")
+    _store_verdict(key, "hash", True)
+
+    clock[0] += security._VERIFY_CACHE_TTL_SECONDS - 1
+    assert _verify_cached(key, "hash") is True
+
+    clock[0] += 1
+    assert _verify_cached(key, "hash") is None
+    assert not security._verify_cache
+
+
+def test_verdict_is_keyed_by_password_and_hash():
+    """A different password or stored hash misses the cache."""
+    _store_verdict(_password_fingerprint("secret"), "hash", True)
+
+    assert _verify_cached(_password_fingerprint("other"), "hash") is None
+    assert _verify_cached(_password_fingerprint("secret"), "other_hash") is None
+
+
+def test_least_recently_used_verdict_is_evicted(monkeypatch):
+    """Once full, the cache evicts the verdict used least recently."""
+    monkeypatch.setattr(security, "_VERIFY_CACHE_MAXSIZE", 2)
+    first, second, third = (_password_fingerprint(p) for p in ("one", "two", "three"))
+
+    _store_verdict(first, "hash", True)
+    _store_verdict(second, "hash", False)
+    assert _verify_cached(first, "hash") is True
+    _store_verdict(third, "hash", True)
+
+    assert _verify_cached(second, "hash") is None
+    assert _verify_cached(first, "hash") is True
+    assert _verify_cached(third, "hash") is True
@@ -0,0 +1,49 @@
+"""
+Tests for the WebSocket connection manager.
+"""
+import pytest
+from app.services import websocket
+from app.services.websocket import ConnectionManager
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable stand-in for time.monotonic."""
+    now = [10.0]
+    monkeypatch.setattr(websocket.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_typing_is_debounced_per_room(clock):
+    """Repeated typing events within the window are forwarded once per room."""
+    manager = ConnectionManager()
+
+    assert manager.should_forward_typing("room_1", "user_1", "typing")
+    clock[0] = 10.5
+    assert not manager.should_forward_typing("room_1", "user_1", "typing")
+    assert manager.should_forward_typing("room_2", "user_1", "typing")
+    clock[0] = 11.0
+    assert manager.should_forward_typing("room_1", "user_1", "typing")
+
+
+def test_stop_typing_is_always_forwarded(clock):
+    """A stop_typing following a forwarded typing is never suppressed."""
+    manager = ConnectionManager()
+
+    assert manager.should_forward_typing("room_1", "user_1", "stop_typing")
+    clock[0] = 10.1
+    assert manager.should_forward_typing("room_1", "user_1", "typing")
+    clock[0] = 10.2
+    assert manager.should_forward_typing("room_1", "user_1", "stop_typing")
+    assert manager.should_forward_typing("room_1", "user_1", "stop_typing")
+
+
+def test_stop_typing_resets_typing_debounce(clock):
+    """Typing again right after a stop is forwarded immediately."""
+    manager = ConnectionManager()
+
+    assert manager.should_forward_typing("room_1", "user_1", "typing")
+    clock[0] = 10.2
+    assert manager.should_forward_typing("room_1", "user_1", "stop_typing")
+    clock[0] = 10.3
+    assert manager.should_forward_typing("room_1", "user_1", "typing")
@@ -31,7 +31,7 @@ class UserLogin(BaseModel):
 class UserResponse(UserBase):
     """Schema for user response (excludes password)."""
     user_id: str
-    created_at: str
+    created_at: datetime
     is_active: bool = True
     
     model_config = ConfigDict(from_attributes=True)
@@ -1,12 +1,29 @@
 """
 WebSocket connection manager for real-time communication.
 """
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, List, Set
 from fastapi import WebSocket
+import asyncio
 import logging
+import orjson
+import time
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between forwarded "typing" events per (room, user);
+# "stop_typing" is never debounced
+TYPING_DEBOUNCE_SECONDS = 1.0
+
+
+async def send_json_fast(websocket: WebSocket, message: dict):
+    """
+    Send a JSON message over a WebSocket, encoding it with orjson.
+    
+    The payload is sent as a text frame, matching ``WebSocket.send_json``.
+    """
+    await websocket.send_text(orjson.dumps(message).decode())
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time features."""
@@ -14,8 +31,12 @@ class ConnectionManager:
     def __init__(self):
         # user_id -> WebSocket
         self.active_connections: Dict[str, WebSocket] = {}
-        # room_id -> list of user_ids
-        self.chat_rooms: Dict[str, List[str]] = {}
+        # room_id -> set of user_ids
+        self.chat_rooms: Dict[str, Set[str]] = defaultdict(set)
+        # user_id -> set of room_ids (reverse index for disconnect)
+        self.user_rooms: Dict[str, Set[str]] = defaultdict(set)
+        # user_id -> room_id -> last forwarded typing event time
+        self._typing_last: Dict[str, Dict[str, float]] = defaultdict(dict)
         # For WebRTC signaling: user_id -> pending signals
         self.pending_signals: Dict[str, List[dict]] = {}
     
@@ -29,7 +50,7 @@ class ConnectionManager:
         """
         await websocket.accept()
         self.active_connections[user_id] = websocket
-        logger.info(f"User {user_id} connected via WebSocket")
+        logger.info("User %s connected via WebSocket", user_id)
     
     def disconnect(self, user_id: str):
         """
@@ -38,23 +59,65 @@ class ConnectionManager:
         Args:
             user_id: User identifier
         """
+        self._typing_last.pop(user_id, None)
+        for room_id in self.user_rooms.pop(user_id, ()):
+            room = self.chat_rooms.get(room_id)
+            if room is not None:
+                room.discard(user_id)
+                if not room:
+                    del self.chat_rooms[room_id]
         if user_id in self.active_connections:
             del self.active_connections[user_id]
-            logger.info(f"User {user_id} disconnected")
+            logger.info("User %s disconnected", user_id)
     
-    async def send_personal_message(self, message: dict, user_id: str):
+    async def send_personal_message(self, message: dict, user_id: str, raise_on_error: bool = False):
         """
         Send a message to a specific user.
         
         Args:
             message: Message data to send
             user_id: Target user identifier
+            raise_on_error: Re-raise send failures after logging them, for
+                callers that need to know whether delivery succeeded
         """
         if user_id in self.active_connections:
             try:
-                await self.active_connections[user_id].send_json(message)
+                await send_json_fast(self.active_connections[user_id], message)
+            except Exception as e:
+                logger.error("Error sending message to %s: %s", user_id, e)
+                if raise_on_error:
+                    raise
+    
+    async def _send_serialized(self, payload: str, user_id: str):
+        """Send an already-serialized JSON payload to a specific user."""
+        websocket = self.active_connections.get(user_id)
+        if websocket is not None:
+            try:
+                await websocket.send_text(payload)
             except Exception as e:
-                logger.error(f"Error sending message to {user_id}: {e}")
+                logger.error("Error sending message to %s: %s", user_id, e)
+    
+    async def broadcast_serialized(self, room_id: str, message: dict, exclude_user: str = None):
+        """
+        Broadcast a message to a room, serializing it once for all recipients.
+        
+        Args:
+            room_id: Room identifier
+            message: Message data to broadcast
+            exclude_user: Optional user_id to exclude from broadcast
+        """
+        targets = self.chat_rooms.get(room_id, set()) - {exclude_user}
+        if not targets:
+            return
+        payload = orjson.dumps(message).decode()
+        await asyncio.gather(
+            *(
+                self._send_serialized(payload, user_id)
+                for user_id in targets
+                if user_id in self.active_connections
+            ),
+            return_exceptions=True
+        )
     
     async def broadcast_to_room(self, room_id: str, message: dict, exclude_user: str = None):
         """
@@ -65,10 +128,7 @@ class ConnectionManager:
             message: Message data to broadcast
             exclude_user: Optional user_id to exclude from broadcast
         """
-        if room_id in self.chat_rooms:
-            for user_id in self.chat_rooms[room_id]:
-                if user_id != exclude_user and user_id in self.active_connections:
-                    await self.send_personal_message(message, user_id)
+        await self.broadcast_serialized(room_id, message, exclude_user=exclude_user)
     
     def join_room(self, room_id: str, user_id: str):
         """
@@ -78,11 +138,10 @@ class ConnectionManager:
             room_id: Room identifier
             user_id: User identifier
         """
-        if room_id not in self.chat_rooms:
-            self.chat_rooms[room_id] = []
         if user_id not in self.chat_rooms[room_id]:
-            self.chat_rooms[room_id].append(user_id)
-            logger.info(f"User {user_id} joined room {room_id}")
+            self.chat_rooms[room_id].add(user_id)
+            self.user_rooms[user_id].add(room_id)
+            logger.info("User %s joined room %s", user_id, room_id)
     
     def leave_room(self, room_id: str, user_id: str):
         """
@@ -92,9 +151,39 @@ class ConnectionManager:
             room_id: Room identifier
             user_id: User identifier
         """
-        if room_id in self.chat_rooms and user_id in self.chat_rooms[room_id]:
-            self.chat_rooms[room_id].remove(user_id)
-            logger.info(f"User {user_id} left room {room_id}")
+        room = self.chat_rooms.get(room_id)
+        if room is not None and user_id in room:
+            room.discard(user_id)
+            if not room:
+                del self.chat_rooms[room_id]
+            self.user_rooms[user_id].discard(room_id)
+            logger.info("User %s left room %s", user_id, room_id)
+    
+    def should_forward_typing(self, room_id: str, user_id: str, event_type: str) -> bool:
+        """
+        Debounce typing indicators so bursts of keystrokes fan out once.
+        
+        "stop_typing" is always forwarded and resets the debounce window, so
+        the next "typing" in the room goes out immediately.
+        
+        Args:
+            room_id: Room identifier
+            user_id: User identifier
+            event_type: "typing" or "stop_typing"
+            
+        Returns:
+            True if the event should be broadcast, False if it is suppressed
+        """
+        last_sent = self._typing_last[user_id]
+        if event_type == "stop_typing":
+            last_sent.pop(room_id, None)
+            return True
+        now = time.monotonic()
+        last = last_sent.get(room_id)
+        if last is not None and now - last < TYPING_DEBOUNCE_SECONDS:
+            return False
+        last_sent[room_id] = now
+        return True
     
     def is_user_online(self, user_id: str) -> bool:
         """
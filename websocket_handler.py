@@ -2,7 +2,7 @@
 WebSocket endpoint for real-time communication.
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from app.services.websocket import manager
+from app.services.websocket import manager, send_json_fast
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,7 +24,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             msg_type = data.get("type")
             
             if msg_type == "ping":
-                await websocket.send_json({"type": "pong"})
+                await send_json_fast(websocket, {"type": "pong"})
             
             elif msg_type == "join_conversation":
                 conversation_id = data.get("conversation_id")
@@ -38,7 +38,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             
             elif msg_type == "typing":
                 conversation_id = data.get("conversation_id")
-                if conversation_id:
+                if conversation_id and manager.should_forward_typing(conversation_id, user_id, msg_type):
                     await manager.broadcast_to_room(conversation_id, {
                         "type": "user_typing",
                         "user_id": user_id
@@ -46,7 +46,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             
             elif msg_type == "stop_typing":
                 conversation_id = data.get("conversation_id")
-                if conversation_id:
+                if conversation_id and manager.should_forward_typing(conversation_id, user_id, msg_type):
                     await manager.broadcast_to_room(conversation_id, {
                         "type": "user_stop_typing",
                         "user_id": user_id
@@ -54,7 +54,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     
     except WebSocketDisconnect:
         manager.disconnect(user_id)
-        logger.info(f"User {user_id} disconnected")
+        logger.info("User %s disconnected", user_id)
     except Exception as e:
-        logger.error(f"WebSocket error for {user_id}: {e}")
+        logger.error("WebSocket error for %s: %s", user_id, e)
         manager.disconnect(user_id)